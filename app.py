@@ -1,12 +1,27 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import gspread
-from google.oauth2.service_account import Credentials
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, PlainValidator, StrictInt, model_validator
+from typing import Annotated, List, Dict, Any, Optional, Union
+import httpx
 from datetime import datetime
 import logging
 import os
-import json
+import hashlib
+import pathlib
+import tempfile
+import orjson
+import math
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from itertools import chain, islice
+from operator import attrgetter
+import numpy as np
+from numba import njit
 
 # -----------------------------
 # Config / Environment
@@ -16,6 +31,22 @@ PORT = int(os.environ.get("PORT", 8000))
 MONTHLY_INTEREST_RATE = float(os.environ.get("MONTHLY_INTEREST_RATE", 1.5))
 # Default number of columns for created worksheets (increased to allow new columns)
 DEFAULT_SHEET_COLS = int(os.environ.get("DEFAULT_SHEET_COLS", 15))
+# Max rows sent in a single Sheets write request; larger statements are split into batches of this size.
+# Typed CellData costs ~510 bytes per invoice row, so 3500 rows keeps a request under Google's recommended 2 MB
+SHEETS_WRITE_BATCH_ROWS = int(os.environ.get("SHEETS_WRITE_BATCH_ROWS", 3500))
+# Max batch requests in flight at once, and retries (exponential backoff) when the Sheets API answers 429
+SHEETS_WRITE_CONCURRENCY = int(os.environ.get("SHEETS_WRITE_CONCURRENCY", 4))
+SHEETS_WRITE_MAX_RETRIES = int(os.environ.get("SHEETS_WRITE_MAX_RETRIES", 5))
+# Invoice count above which statement preparation runs in the threadpool instead of on the event loop
+THREADPOOL_MIN_INVOICES = int(os.environ.get("THREADPOOL_MIN_INVOICES", 100000))
+# On-disk cache for /get_statement reads, keyed by worksheet name + spreadsheet modifiedTime
+STATEMENT_CACHE_DIR = os.environ.get("STATEMENT_CACHE_DIR", ".statement_cache")
+# Max age (seconds) and max number of cached statements kept on disk
+STATEMENT_CACHE_MAX_AGE = int(os.environ.get("STATEMENT_CACHE_MAX_AGE", 86400))
+STATEMENT_CACHE_MAX_SIZE = int(os.environ.get("STATEMENT_CACHE_MAX_SIZE", 256))
+# Append every statement to one long-lived worksheet instead of creating a new worksheet per call
+APPEND_MODE = os.environ.get("APPEND_MODE", "false").lower() == "true"
+STATEMENTS_WORKSHEET_NAME = os.environ.get("STATEMENTS_WORKSHEET_NAME", "Statements")
 
 # -----------------------------
 # Logging Setup
@@ -29,142 +60,398 @@ logger = logging.getLogger(__name__)
 # -----------------------------
 # FastAPI App
 # -----------------------------
+class ORJSONRequest(Request):
+    """Request whose JSON body is parsed with orjson instead of the stdlib json module."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """Route class that hands endpoints an ORJSONRequest (orjson-parsed request bodies)."""
+
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            return await original_route_handler(ORJSONRequest(request.scope, request.receive))
+
+        return route_handler
+
+
 app = FastAPI(
     title="Statement of Accounts API",
     version="1.0.0",
-    description="API for managing invoices and payments in Google Sheets"
+    description="API for managing invoices and payments in Google Sheets",
+    default_response_class=ORJSONResponse,
 )
+# Must be set before any route is declared
+app.router.route_class = ORJSONRoute
+
+# -----------------------------
+# Helper Functions
+# -----------------------------
+# Characters stripped from numeric strings in one str.translate pass (surrounding whitespace is ignored by float())
+_CURRENCY_STRIP = str.maketrans('', '', ',₹$')
+
+
+def safe_float_conversion(value, default=0.0):
+    """Safely convert a value to float (handles strings with currency and commas)."""
+    # Fast paths for already-numeric input (exact type checks are a pointer compare)
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
+        return float(value)
+    if value is None:
+        return default
+    try:
+        if value_type is str:
+            value = value.translate(_CURRENCY_STRIP)
+        return float(value)
+    except (ValueError, TypeError):
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning("Could not convert '%s' to float, using default %s", value, default)
+        return default
+
+
+def safe_int_conversion(value, default=0):
+    """Safely convert to int (handles strings)."""
+    value_type = type(value)
+    if value_type is int:
+        return value
+    if value is None:
+        return default
+    try:
+        if value_type is str:
+            value = value.strip()
+        return int(value)
+    except (ValueError, TypeError):
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning("Could not convert '%s' to int, using default %s", value, default)
+        return default
+
+
+def coerce_text(value):
+    """Coerce a sheet text field to str (None -> "", non-strings via str())."""
+    if value is None:
+        return ""
+    if type(value) is str:
+        return value
+    return str(value)
 
 # -----------------------------
 # Pydantic Models
 # -----------------------------
-class Invoice(BaseModel):
-    # Keep model keys as underscore style — but code accepts both underscore and space keys
-    Date_Formatted: Optional[str] = None
-    Reference_Number: Optional[str] = None
-    Total_Formatted: Optional[str] = None
-    Balance_Formatted: Optional[str] = None
-    Status: Optional[str] = None
-    Age: Optional[int] = None  # days overdue
-    Invoice_ID: Optional[str] = None
-    Balance_Due: Optional[float] = None
+def _lenient(core_type, fallback):
+    """Field type validated by pydantic-core as core_type; only values it rejects are passed to fallback (Python)."""
+    return Annotated[Union[core_type, Annotated[Any, PlainValidator(fallback)]], Field(union_mode="left_to_right")]
+
+
+# Native str / numbers never leave pydantic-core; currency strings, bad text etc. take the Python path
+LenientText = _lenient(str, coerce_text)
+# StrictInt: text such as "45.0" must go through int() like before (-> default), not pydantic's lax int parsing
+LenientInt = _lenient(StrictInt, safe_int_conversion)
+LenientFloat = _lenient(float, safe_float_conversion)
+
+
+class _SheetRecord(BaseModel):
+    """Base for sheet records: a None / "" value counts as missing, so the other key spelling (or the default) applies."""
+    model_config = ConfigDict(populate_by_name=True, coerce_numbers_to_str=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _drop_blank_values(cls, data):
+        if isinstance(data, dict):
+            return {key: value for key, value in data.items() if value is not None and value != ""}
+        return data
 
 
-class Payment(BaseModel):
-    Payment_ID: Optional[str] = None
-    Paid_Amount: Optional[float] = None
-    Unused_Amount: Optional[float] = None
+class Invoice(_SheetRecord):
+    # Keep model keys as underscore style — aliases also accept the space keys callers send (e.g. 'Balance Due'),
+    # which win when both are present. Values are coerced leniently (currency strings, numbers as text)
+    Date_Formatted: LenientText = Field("", validation_alias=AliasChoices("Date Formatted", "Date_Formatted"))
+    Reference_Number: LenientText = Field("", validation_alias=AliasChoices("Reference Number", "Reference_Number"))
+    Total_Formatted: LenientText = Field("", validation_alias=AliasChoices("Total Formatted", "Total_Formatted"))
+    Balance_Formatted: LenientText = Field("", validation_alias=AliasChoices("Balance Formatted", "Balance_Formatted"))
+    Status: LenientText = ""
+    Age: LenientInt = 0  # days overdue
+    Invoice_ID: LenientText = Field("", validation_alias=AliasChoices("Invoice ID", "Invoice_ID"))
+    Balance_Due: LenientFloat = Field(0.0, validation_alias=AliasChoices("Balance Due", "Balance_Due"))
+
+
+class Payment(_SheetRecord):
+    Payment_ID: LenientText = Field("", validation_alias=AliasChoices("Payment ID", "Payment_ID"))
+    Paid_Amount: LenientFloat = Field(0.0, validation_alias=AliasChoices("Paid Amount", "Paid_Amount"))
+    Unused_Amount: LenientFloat = Field(0.0, validation_alias=AliasChoices("Unused Amount", "Unused_Amount"))
 
 
 class StatementData(BaseModel):
-    invoices: List[Dict[str, Any]]
-    payments: List[Dict[str, Any]]
+    invoices: List[Invoice]
+    payments: List[Payment]
 
 # -----------------------------
 # Google Sheets Configuration
 # -----------------------------
 SPREADSHEET_ID = "1-i1iJ_tPviu_KMtS06EtWVS1BBzbUuoEf0DtpkGtmrg"
-CREDENTIALS_FILE = "cred.json"  # Primary credentials path
+CREDENTIALS_FILE = "cred.json"  # Default credentials path
+# Service account file actually used (GOOGLE_APPLICATION_CREDENTIALS overrides the default)
+CREDENTIALS_PATH = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", CREDENTIALS_FILE)
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
 
 # -----------------------------
 # Google Sheets Client
 # -----------------------------
-def get_google_sheets_client():
-    """Initialize Google Sheets client with service account credentials.
-    Tries multiple common file paths to find the credential file.
-    Returns gspread client or None if not available.
+# Authorized client shared across requests (built lazily on first use), plus where its credentials came from
+_client_lock = threading.Lock()
+_client_cache = None
+_credentials_info: Dict[str, Any] = {}
+
+
+def get_google_sheets_client(force=False):
+    """Return the cached Google Sheets client, initializing it on first use.
+    Pass force=True to re-read the credentials file and re-authorize.
+    Returns gspread client or None if not available (failures are not cached).
+    A failed forced refresh returns None but keeps the previously cached client for other requests.
     """
-    try:
-        SCOPES = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
+    global _client_cache, _credentials_info
+    if _client_cache is not None and not force:
+        return _client_cache
 
-        possible_paths = [
-            "cred.json",
-            "./cred.json",
-            "../cred.json",
-            "service-account-credentials.json",
-            "credentials.json",
-            "./credentials/cred.json",
-        ]
+    with _client_lock:
+        if _client_cache is None or force:
+            client, credentials_info = _create_google_sheets_client()
+            if client is None:
+                return None
+            _client_cache, _credentials_info = client, credentials_info
+        return _client_cache
 
-        logger.info("🔍 Searching for Google Sheets credentials...")
-        for credentials_path in possible_paths:
-            if os.path.exists(credentials_path):
-                try:
-                    logger.info(f"📄 Found credentials file at: {credentials_path}")
-                    with open(credentials_path, 'r') as f:
-                        cred_data = json.load(f)
-
-                    required_fields = ['client_email', 'private_key', 'project_id']
-                    missing_fields = [field for field in required_fields if not cred_data.get(field)]
-                    if missing_fields:
-                        logger.error(f"❌ Credentials file missing fields: {missing_fields}")
-                        continue
-
-                    creds = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
-                    client = gspread.authorize(creds)
-                    logger.info("✅ Successfully connected to Google Sheets!")
-                    logger.info(f"📧 Service Account: {cred_data.get('client_email')}")
-                    return client
-
-                except json.JSONDecodeError:
-                    logger.error(f"❌ Invalid JSON in credentials file: {credentials_path}")
-                    continue
-                except Exception as e:
-                    logger.error(f"❌ Error loading credentials from {credentials_path}: {str(e)}")
-                    continue
-
-        logger.error("❌ No valid Google Sheets credentials found!")
-        logger.error("📝 Ensure cred.json exists, is valid, and the sheet is shared with the service account email")
-        return None
 
+def get_credentials_info():
+    """Return {'credentials_path', 'client_email'} for the cached client (empty if not initialized)."""
+    return _credentials_info
+
+
+def _create_google_sheets_client():
+    """Initialize Google Sheets client with service account credentials from CREDENTIALS_PATH.
+    Returns (gspread client, credentials info) or (None, {}) if not available.
+    gspread / google-auth are imported here (first use) rather than at module load to keep cold starts fast.
+    """
+    try:
+        import gspread
+        from google.oauth2.service_account import Credentials
+
+        logger.info(f"📄 Loading Google Sheets credentials from: {CREDENTIALS_PATH}")
+        creds = Credentials.from_service_account_file(CREDENTIALS_PATH, scopes=SCOPES)
+        client = gspread.authorize(creds)
+        logger.info("✅ Successfully connected to Google Sheets!")
+        logger.info(f"📧 Service Account: {creds.service_account_email}")
+        return client, {
+            "credentials_path": CREDENTIALS_PATH,
+            "client_email": creds.service_account_email,
+        }
+
+    except FileNotFoundError:
+        logger.error(f"❌ Credentials file not found: {CREDENTIALS_PATH}")
+    except ValueError as e:
+        # Invalid JSON or missing service account fields
+        logger.error(f"❌ Invalid credentials file {CREDENTIALS_PATH}: {str(e)}")
     except Exception as e:
         logger.error(f"❌ Unexpected error initializing Google Sheets client: {str(e)}")
-        return None
+
+    logger.error("📝 Ensure cred.json exists, is valid, and the sheet is shared with the service account email")
+    return None, {}
 
 # -----------------------------
-# Helper Functions
+# Interest Kernel (Numba)
 # -----------------------------
-def safe_float_conversion(value, default=0.0):
-    """Safely convert a value to float (handles strings with currency and commas)."""
-    if value is None:
-        return default
-    try:
-        if isinstance(value, str):
-            value = value.replace(',', '').replace('₹', '').replace('$', '').strip()
-        return float(value)
-    except (ValueError, TypeError):
-        logger.warning(f"Could not convert '{value}' to float, using default {default}")
-        return default
+# fastmath without nnan/ninf: the overflow check below must survive optimisation
+@njit(cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"}, nogil=True)
+def _compute_interest(balances, ages, monthly_rate):
+    """Compiled interest kernel over invoice arrays (releases the GIL while it runs).
+    Returns (interest, totals, sum_balance, sum_interest, sum_total); ages (float64 days) must already be clamped to >= 0.
+    Interest that overflows on a finite balance (absurd ages) is recorded as 0 for that invoice; a nan / inf
+    balance keeps its nan / inf interest so balance, interest and total stay consistent.
+    """
+    n = balances.shape[0]
+    interest = np.empty(n)
+    totals = np.empty(n)
+    sum_balance = 0.0
+    sum_interest = 0.0
+    sum_total = 0.0
+    # Loop-invariant base: (1 + r) ** m - 1 == expm1(m * log(1 + r)), one libm call per invoice
+    log_base = math.log(1.0 + monthly_rate / 100.0)
+    for i in range(n):
+        m = ages[i] / 30.0
+        value = balances[i] * math.expm1(log_base * m)
+        interest[i] = value if math.isfinite(value) or not math.isfinite(balances[i]) else 0.0
+        totals[i] = balances[i] + interest[i]
+        sum_balance += balances[i]
+        sum_interest += interest[i]
+        sum_total += totals[i]
+    return interest, totals, sum_balance, sum_interest, sum_total
+
+
+# Pay the JIT compile (or cache load) cost at import instead of on the first request
+_compute_interest(np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64), float(MONTHLY_INTEREST_RATE))
 
+# -----------------------------
+# Sheet Layout Templates
+# -----------------------------
+# Static row blocks spliced into every statement (built once at import, never mutated)
+_BLANK = [""]
+_DIVIDER = ["=" * 80]
+_HEADER_TEMPLATE_PREFIX = [
+    ["STATEMENT OF ACCOUNTS"],
+]
+# Invoices Section — we've placed Interest & Total Balance after Balance (as requested)
+_INVOICE_SECTION_HEADER = [
+    _BLANK,
+    _DIVIDER,
+    _BLANK,
+    ["INVOICES SECTION"],
+    ["Date", "Reference", "Total", "Balance", "Interest", "Total Balance", "Status", "Age", "Invoice ID", "Balance Due"],
+]
+# Separator rows + Payments Section (unchanged format)
+_PAYMENT_SECTION_HEADER = [
+    _BLANK,
+    _DIVIDER,
+    _BLANK,
+    ["PAYMENTS SECTION"],
+    ["Payment ID", "Paid Amount", "Unused Amount"],
+]
+# Separator rows + Financial Summary heading
+_SUMMARY_SECTION_HEADER = [
+    _BLANK,
+    _DIVIDER,
+    _BLANK,
+    ["FINANCIAL SUMMARY"],
+    _BLANK,
+]
+
+
+def _build_summary(total_balance_due, total_interest, total_total_balance, total_paid_amount, total_unused_amount,
+                   status_counts, invoices_count, payments_count):
+    """Financial Summary rows and the summary dict returned to callers (without rows_written)."""
+    net_outstanding = total_balance_due - (total_paid_amount - total_unused_amount)
+
+    # Separator rows + Financial Summary — raw floats for numeric values, includes interest totals and applied rate line above
+    summary_rows: List[List[Any]] = list(_SUMMARY_SECTION_HEADER)
+    summary_rows += [
+        ["Total Balance Due:", total_balance_due],
+        ["Total Interest:", total_interest],
+        ["Total (Balance + Interest):", total_total_balance],
+        ["Total Paid Amount:", total_paid_amount],
+        ["Total Unused Amount:", total_unused_amount],
+        ["Net Outstanding (Balance - Paid + Unused):", net_outstanding],
+        _BLANK,
+        ["INVOICE STATUS BREAKDOWN:"],
+    ]
+
+    for status, count in status_counts.items():
+        summary_rows.append([f"{status}:", count])
+
+    summary_rows += [
+        _BLANK,
+        [f"Total Invoices: {invoices_count}"],
+        [f"Total Payments: {payments_count}"],
+        [f"Total Records: {invoices_count + payments_count}"],
+        _BLANK,
+        _DIVIDER,
+    ]
+
+    summary = {
+        "total_balance_due": total_balance_due,
+        "total_interest": total_interest,
+        "total_balance_plus_interest": total_total_balance,
+        "total_paid_amount": total_paid_amount,
+        "total_unused_amount": total_unused_amount,
+        "net_outstanding": net_outstanding,
+        "status_counts": status_counts,
+        "invoices_count": invoices_count,
+        "payments_count": payments_count,
+    }
+    return summary_rows, summary
 
-def safe_int_conversion(value, default=0):
-    """Safely convert to int (handles strings)."""
-    if value is None:
-        return default
-    try:
-        if isinstance(value, str):
-            value = value.strip()
-        return int(value)
-    except (ValueError, TypeError):
-        logger.warning(f"Could not convert '{value}' to int, using default {default}")
-        return default
 
+# Everything after the "Generated on" / interest-rate lines for a statement with no invoices or payments
+# (same totals types as the full path: float sums from NumPy, int 0 from summing empty payment columns)
+_empty_summary_rows, _EMPTY_SUMMARY = _build_summary(0.0, 0.0, 0.0, 0, 0, {}, 0, 0)
+_EMPTY_STATEMENT_ROWS = [*_INVOICE_SECTION_HEADER, *_PAYMENT_SECTION_HEADER, *_empty_summary_rows]
+_EMPTY_SUMMARY["rows_written"] = len(_HEADER_TEMPLATE_PREFIX) + 2 + len(_EMPTY_STATEMENT_ROWS)
+del _empty_summary_rows
 
-def get_invoice_field(inv: Dict[str, Any], *keys, default=None):
-    """Return the first existing key from keys in invoice dictionary.
-    Helps accept both 'Balance Due' and 'Balance_Due' style keys.
-    """
-    for k in keys:
-        if k in inv and inv[k] not in (None, ""):
-            return inv[k]
-    return default
+# -----------------------------
+# Row Generators
+# -----------------------------
+# Text columns of an invoice row, in sheet column order
+_invoice_fields = attrgetter(
+    "Date_Formatted", "Reference_Number", "Total_Formatted", "Balance_Formatted", "Status", "Invoice_ID"
+)
+# Fields aggregated into the summary
+_invoice_aggregates = attrgetter("Balance_Due", "Age", "Status")
+_payment_aggregates = attrgetter("Paid_Amount", "Unused_Amount")
+
+
+def _columns(getter, records, width):
+    """Transpose records into width per-field tuples in a single pass."""
+    if not records:
+        return ((),) * width
+    return tuple(zip(*map(getter, records)))
+
+
+def _iter_invoice_rows(invoices_data, balances, ages, interest, totals):
+    """Yield one sheet row per invoice from the precomputed numeric columns."""
+    # Local binding: skip the global lookup on every row
+    fields = _invoice_fields
+    for inv, balance_due, age_days, interest_val, total_balance in zip(invoices_data, balances, ages, interest, totals):
+        date, ref, tot, bal, status, inv_id = fields(inv)
+        # Clamp negative ages to 0 (as the interest kernel does)
+        age_days = age_days if age_days > 0 else 0
+        # Invoice row: raw floats for interest and total_balance (no rounding/formatting)
+        yield [
+            date,
+            ref,
+            tot,
+            bal,
+            interest_val,              # raw float
+            total_balance,             # raw float
+            status,
+            age_days,                  # int, written as a number cell
+            inv_id,
+            balance_due,
+        ]
+
+
+def _iter_payment_rows(payments_data, paid_amounts, unused_amounts):
+    """Yield one sheet row per payment from the pre-parsed amounts."""
+    for pay, paid, unused in zip(payments_data, paid_amounts, unused_amounts):
+        yield [
+            pay.Payment_ID,
+            paid,
+            unused,
+        ]
 
 # -----------------------------
 # Core: prepare_sheet_data
 # -----------------------------
+def _statement_header(monthly_rate):
+    """Title, generation timestamp and applied-rate rows that open every statement."""
+    # f-string formatting of the date parts is much cheaper than strftime's format interpreter
+    now = datetime.now()
+    current_time = f"{now.year:04d}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+    header_rows: List[List[Any]] = list(_HEADER_TEMPLATE_PREFIX)
+    header_rows.append([f"Generated on: {current_time}"])
+    header_rows.append([f"Interest rate (per month): {monthly_rate}%"])  # show applied monthly rate
+    return header_rows
+
+
 def prepare_sheet_data(invoices_data, payments_data, monthly_rate=MONTHLY_INTEREST_RATE):
     """
     Prepare rows for Google Sheets and compute interest & total balance.
@@ -174,6 +461,8 @@ def prepare_sheet_data(invoices_data, payments_data, monthly_rate=MONTHLY_INTERE
     - Age is clamped to >= 0 (negative ages treated as 0)
     - Keeps raw float precision (no rounding / no currency formatting)
     - Accepts invoice keys with spaces or underscores (e.g., 'Balance Due' or 'Balance_Due')
+    - Returns (rows, summary): rows is an iterator that yields invoice/payment rows lazily;
+      summary["rows_written"] holds the total number of rows it will produce
     """
     try:
         if not isinstance(invoices_data, list):
@@ -181,142 +470,76 @@ def prepare_sheet_data(invoices_data, payments_data, monthly_rate=MONTHLY_INTERE
         if not isinstance(payments_data, list):
             payments_data = []
 
-        logger.info(f"📊 Processing {len(invoices_data)} invoices and {len(payments_data)} payments")
+        # Empty statement: everything but the timestamp/rate lines is a fixed template
+        if not invoices_data and not payments_data:
+            return chain(_statement_header(monthly_rate), _EMPTY_STATEMENT_ROWS), {**_EMPTY_SUMMARY, "status_counts": {}}
 
-        total_balance_due = 0.0
-        total_interest = 0.0
-        total_total_balance = 0.0
+        # Request bodies arrive as validated models; plain dicts from direct callers are validated here
+        invoices_data = [inv if isinstance(inv, Invoice) else Invoice.model_validate(inv) for inv in invoices_data]
+        payments_data = [pay if isinstance(pay, Payment) else Payment.model_validate(pay) for pay in payments_data]
 
-        # Payment totals (safe conversion)
-        total_paid_amount = sum(safe_float_conversion(get_invoice_field(p, "Paid Amount", "Paid_Amount", default=0)) for p in payments_data)
-        total_unused_amount = sum(safe_float_conversion(get_invoice_field(p, "Unused Amount", "Unused_Amount", default=0)) for p in payments_data)
+        logger.info("📊 Processing %d invoices and %d payments", len(invoices_data), len(payments_data))
 
-        # Status counting
-        status_counts: Dict[str, int] = {}
-        for inv in invoices_data:
-            st = str(get_invoice_field(inv, "Status", "Status", default="Unknown")).strip() or "Unknown"
-            status_counts[st] = status_counts.get(st, 0) + 1
+        # One pass per list pulls all aggregated fields together (map + zip run in C)
+        balance_col, age_col, status_col = _columns(_invoice_aggregates, invoices_data, 3)
+        paid_amounts, unused_amounts = _columns(_payment_aggregates, payments_data, 2)
+
+        # Payment totals (amounts parsed once by the Payment model, reused for rows)
+        total_paid_amount = sum(paid_amounts)
+        total_unused_amount = sum(unused_amounts)
 
-        rows: List[List[Any]] = []
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Status counting
+        status_counts: Dict[str, int] = dict(Counter(st.strip() or "Unknown" for st in status_col))
 
         # Header (human readable)
-        rows.extend([
-            ["STATEMENT OF ACCOUNTS"],
-            [f"Generated on: {current_time}"],
-            [f"Interest rate (per month): {monthly_rate}%"],  # show applied monthly rate
-            [""],
-            ["=" * 80],
-            [""],
-        ])
-
-        # Invoices Section — we've placed Interest & Total Balance after Balance (as requested)
-        rows.extend([
-            ["INVOICES SECTION"],
-            ["Date", "Reference", "Total", "Balance", "Interest", "Total Balance", "Status", "Age", "Invoice ID", "Balance Due"],
-        ])
-
-        for inv in invoices_data:
-            # Normalize fields: accept both "Balance Due" and "Balance_Due", etc.
-            balance_due = safe_float_conversion(get_invoice_field(inv, "Balance Due", "Balance_Due", default=0))
-            age_days = safe_int_conversion(get_invoice_field(inv, "Age", "Age", default=0))
-            # Clamp negative ages to 0 to avoid negative compounding
-            age_days = max(age_days, 0)
-
-            total_balance_due += balance_due
-
-            # Monthly compound interest computation
-            months = age_days / 30.0
-            try:
-                interest_val = balance_due * ((1 + (monthly_rate / 100.0)) ** months - 1.0)
-            except Exception as e:
-                logger.warning(f"Could not compute interest for invoice {get_invoice_field(inv, 'Invoice ID', 'Invoice_ID', default='?')}: {e}")
-                interest_val = 0.0
-
-            total_balance = balance_due + interest_val
-
-            # Accumulate summary totals
-            total_interest += interest_val
-            total_total_balance += total_balance
-
-            # Append invoice row: raw floats for interest and total_balance (no rounding/formatting)
-            rows.append([
-                str(get_invoice_field(inv, "Date Formatted", "Date_Formatted", default="")),
-                str(get_invoice_field(inv, "Reference Number", "Reference_Number", default="")),
-                str(get_invoice_field(inv, "Total Formatted", "Total_Formatted", default="")),
-                str(get_invoice_field(inv, "Balance Formatted", "Balance_Formatted", default="")),
-                interest_val,              # raw float
-                total_balance,             # raw float
-                str(get_invoice_field(inv, "Status", "Status", default="")),
-                str(age_days),
-                str(get_invoice_field(inv, "Invoice ID", "Invoice_ID", default="")),
-                balance_due,
-            ])
-
-        # Separator rows
-        rows.extend([[""], ["=" * 80], [""]])
-
-        # Payments Section (unchanged format, safe numeric conversion)
-        rows.extend([
-            ["PAYMENTS SECTION"],
-            ["Payment ID", "Paid Amount", "Unused Amount"],
-        ])
-
-        for pay in payments_data:
-            rows.append([
-                str(get_invoice_field(pay, "Payment ID", "Payment_ID", default="")),
-                safe_float_conversion(get_invoice_field(pay, "Paid Amount", "Paid_Amount", default=0)),
-                safe_float_conversion(get_invoice_field(pay, "Unused Amount", "Unused_Amount", default=0)),
-            ])
-
-        rows.extend([[""], ["=" * 80], [""]])
-
-        # Financial Summary — raw floats for numeric values, includes interest totals and applied rate line above
-        net_outstanding = total_balance_due - (total_paid_amount - total_unused_amount)
-        rows.extend([
-            ["FINANCIAL SUMMARY"],
-            [""],
-            ["Total Balance Due:", total_balance_due],
-            ["Total Interest:", total_interest],
-            ["Total (Balance + Interest):", total_total_balance],
-            ["Total Paid Amount:", total_paid_amount],
-            ["Total Unused Amount:", total_unused_amount],
-            ["Net Outstanding (Balance - Paid + Unused):", net_outstanding],
-            [""],
-            ["INVOICE STATUS BREAKDOWN:"],
-        ])
-
-        for status, count in status_counts.items():
-            rows.append([f"{status}:", count])
-
-        rows.extend([
-            [""],
-            [f"Total Invoices: {len(invoices_data)}"],
-            [f"Total Payments: {len(payments_data)}"],
-            [f"Total Records: {len(invoices_data) + len(payments_data)}"],
-            [""],
-            ["=" * 80],
-        ])
-
-        summary = {
-            "total_balance_due": total_balance_due,
-            "total_interest": total_interest,
-            "total_balance_plus_interest": total_total_balance,
-            "total_paid_amount": total_paid_amount,
-            "total_unused_amount": total_unused_amount,
-            "net_outstanding": net_outstanding,
-            "status_counts": status_counts,
-            "invoices_count": len(invoices_data),
-            "payments_count": len(payments_data),
-            "rows_written": len(rows),
-        }
+        header_rows = _statement_header(monthly_rate)
+        header_rows += _INVOICE_SECTION_HEADER
+
+        # Numeric core: Balance Due / Age columns as arrays for the interest kernel
+        balances = np.array(balance_col, dtype=np.float64)
+        # float64 ages, negative ages clamped to 0 to avoid negative compounding. Ints beyond float range take
+        # the slow path: clamped before conversion (huge positive ages become inf and their interest is zeroed)
+        try:
+            ages = np.maximum(np.array(age_col, dtype=np.float64), 0.0)
+        except OverflowError:
+            ages = np.array([0.0 if age <= 0 else (age if age < 1e308 else math.inf) for age in age_col], dtype=np.float64)
+
+        # Monthly compound interest computation (compiled kernel)
+        if monthly_rate == 0:
+            # Zero-rate configuration: interest is identically 0, skip the kernel
+            interest = np.zeros_like(balances)
+            totals = balances
+            total_balance_due = total_total_balance = float(balances.sum())
+            total_interest = 0.0
+        else:
+            interest, totals, total_balance_due, total_interest, total_total_balance = _compute_interest(
+                balances, ages, float(monthly_rate)
+            )
+
+        summary_rows, summary = _build_summary(
+            total_balance_due, total_interest, total_total_balance, total_paid_amount, total_unused_amount,
+            status_counts, len(invoices_data), len(payments_data),
+        )
+
+        # Invoice/payment rows are generated on demand; only the small fixed blocks are materialized
+        rows = chain(
+            header_rows,
+            _iter_invoice_rows(invoices_data, balance_col, age_col, interest.tolist(), totals.tolist()),
+            _PAYMENT_SECTION_HEADER,
+            _iter_payment_rows(payments_data, paid_amounts, unused_amounts),
+            summary_rows,
+        )
+        rows_written = (
+            len(header_rows) + len(invoices_data) + len(_PAYMENT_SECTION_HEADER) + len(payments_data) + len(summary_rows)
+        )
+        summary["rows_written"] = rows_written
 
-        logger.info(f"✅ Data preparation complete with interest: {len(rows)} rows prepared")
+        logger.info("✅ Data preparation complete with interest: %d rows prepared", rows_written)
         return rows, summary
 
     except Exception as e:
         logger.error(f"❌ Error preparing sheet data: {str(e)}")
-        return [], {
+        return iter(()), {
             "error": str(e),
             "total_balance_due": 0,
             "total_interest": 0,
@@ -327,57 +550,334 @@ def prepare_sheet_data(invoices_data, payments_data, monthly_rate=MONTHLY_INTERE
             "status_counts": {},
         }
 
+# -----------------------------
+# Off-loop Data Preparation
+# -----------------------------
+async def prepare_statement(invoices_data, payments_data):
+    """Run prepare_sheet_data, moving large payloads (> THREADPOOL_MIN_INVOICES invoices) off the event loop.
+    The interest kernel is compiled nogil, and rows stay a lazy iterator (nothing is copied between processes).
+    """
+    if len(invoices_data) > THREADPOOL_MIN_INVOICES:
+        logger.info("⚙️ Preparing %d invoices in the threadpool", len(invoices_data))
+        return await run_in_threadpool(prepare_sheet_data, invoices_data, payments_data)
+    return prepare_sheet_data(invoices_data, payments_data)
+
 # -----------------------------
 # Write to Google Sheets
 # -----------------------------
-def write_to_google_sheets(client, rows):
-    """Write data to Google Sheets using batch updates. Creates a new worksheet for each statement."""
+def get_access_token(client):
+    """Return a valid OAuth access token from the gspread client's credentials (refreshing if needed)."""
+    creds = client.http_client.auth
+    if not creds.valid:
+        from google.auth.transport.requests import Request as GoogleAuthRequest
+        creds.refresh(GoogleAuthRequest())
+    return creds.token
+
+
+def _cell_data(value):
+    """Typed CellData for a row value: numbers as numberValue, everything else as stringValue."""
+    if type(value) is float or type(value) is int:
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": value if type(value) is str else str(value)}}
+
+
+def _row_data(row):
+    """RowData for one sheet row."""
+    return {"values": [_cell_data(value) for value in row]}
+
+
+def _add_sheet_request(sheet_id, worksheet_name, row_count):
+    """AddSheetRequest with a client-chosen sheetId so cell updates can target it in the same batch."""
+    return {
+        "addSheet": {
+            "properties": {
+                "sheetId": sheet_id,
+                "title": worksheet_name,
+                "gridProperties": {"rowCount": max(row_count + 20, 100), "columnCount": DEFAULT_SHEET_COLS},
+            }
+        }
+    }
+
+
+def _update_cells_request(sheet_id, row_index, rows):
+    """UpdateCellsRequest writing rows (typed values) starting at row_index of the sheet."""
+    return {
+        "updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": row_index, "columnIndex": 0},
+            "rows": [_row_data(row) for row in rows],
+            "fields": "userEnteredValue",
+        }
+    }
+
+
+def _encode_update_cells(sheet_id, row_index, rows, *extra_requests):
+    """batchUpdate body bytes: extra_requests (e.g. addSheet) followed by updateCells for rows."""
+    return orjson.dumps({"requests": [*extra_requests, _update_cells_request(sheet_id, row_index, rows)]})
+
+
+def _iter_statement_body(sheet_id, worksheet_name, rows, row_count, chunk_rows=500):
+    """Yield a spreadsheets:batchUpdate body (addSheet + updateCells for all rows), encoding chunk_rows rows at a time."""
+    add_sheet = orjson.dumps(_add_sheet_request(sheet_id, worksheet_name, row_count))
+    if not row_count:
+        yield b'{"requests":[' + add_sheet + b"]}"
+        return
+
+    start = orjson.dumps({"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0})
+    yield b'{"requests":[' + add_sheet + b',{"updateCells":{"start":' + start + b',"fields":"userEnteredValue","rows":['
+    separator = b""
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        yield separator + b",".join(orjson.dumps(_row_data(row)) for row in chunk)
+        separator = b","
+    yield b"]}}]}"
+
+
+async def _post_batch_update(session, content):
+    """POST one spreadsheets:batchUpdate request, raising httpx.HTTPStatusError on failure."""
+    response = await session.post(f"{SHEETS_API_URL}/{SPREADSHEET_ID}:batchUpdate", content=content)
+    response.raise_for_status()
+    return response
+
+
+class _WriteLimiter:
+    """Rate-limit handling shared by all batchUpdate requests of one statement write.
+    async with limiter caps requests in flight at SHEETS_WRITE_CONCURRENCY; post() retries 429s with
+    exponential backoff, and once the API has rate-limited, requests go out one at a time.
+    """
+
+    def __init__(self, concurrency=SHEETS_WRITE_CONCURRENCY):
+        self._slots = asyncio.Semaphore(concurrency)
+        self._serial = asyncio.Lock()
+        self._rate_limited = False
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self._slots.release()
+
+    async def post(self, session, content):
+        """POST a batchUpdate body (bytes, so it can be resent), retrying rate-limited (429) responses."""
+        for attempt in range(SHEETS_WRITE_MAX_RETRIES + 1):
+            try:
+                if self._rate_limited:
+                    async with self._serial:
+                        return await _post_batch_update(session, content)
+                return await _post_batch_update(session, content)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 429 or attempt == SHEETS_WRITE_MAX_RETRIES:
+                    raise
+                self._rate_limited = True
+                delay = 2 ** attempt + random.random()
+                logger.warning("⚠️ Sheets API rate limit hit, retrying request in %.1fs (serial mode)", delay)
+                await asyncio.sleep(delay)
+
+
+async def write_batches_concurrently(session, limiter, sheet_id, rows, start_row_index, row_count, batch_size):
+    """Write rows start_row_index..row_count in batch_size updateCells chunks as concurrent batchUpdate requests
+    (see _WriteLimiter). If any batch fails the others are cancelled before the error propagates.
+    """
+    batch_count = -(-(row_count - start_row_index) // batch_size)
+    logger.info("📤 Writing %d rows in %d concurrent batches", row_count - start_row_index, batch_count)
+    next_row_index = start_row_index
+
+    async def send():
+        nonlocal next_row_index
+        async with limiter:
+            # Slice and encode only once a slot is free, so at most SHEETS_WRITE_CONCURRENCY payloads exist at a time
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return None
+            row_index = next_row_index
+            next_row_index += len(batch)
+            payload = await run_in_threadpool(_encode_update_cells, sheet_id, row_index, batch)
+            return await limiter.post(session, payload)
+
+    tasks = [asyncio.ensure_future(send()) for _ in range(batch_count)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop the remaining batches writing into a half-filled sheet, and let them finish before the client closes
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+# Serializes appends within this process so two statements never pick the same start row
+_append_lock = threading.Lock()
+
+
+def append_to_statements_worksheet(client, rows):
+    """Write rows below everything already in the shared STATEMENTS_WORKSHEET_NAME worksheet (created on first use).
+    The start row is the used length of column A (internal blank rows included). values.append is not used:
+    its table detection stops at a statement's blank separator rows and would insert inside the previous statement.
+    Blocking (gspread) — call via run_in_threadpool.
+    """
+    import gspread
+
+    rows = list(rows)
     try:
         spreadsheet = client.open_by_key(SPREADSHEET_ID)
+        try:
+            worksheet = spreadsheet.worksheet(STATEMENTS_WORKSHEET_NAME)
+        except gspread.WorksheetNotFound:
+            logger.info("📝 Creating statements worksheet: %s", STATEMENTS_WORKSHEET_NAME)
+            try:
+                worksheet = spreadsheet.add_worksheet(title=STATEMENTS_WORKSHEET_NAME, rows=1, cols=DEFAULT_SHEET_COLS)
+            except gspread.exceptions.APIError as e:
+                # A concurrent first call created it in the meantime
+                if "already exists" not in str(e):
+                    raise
+                worksheet = spreadsheet.worksheet(STATEMENTS_WORKSHEET_NAME)
+        with _append_lock:
+            start_row = len(worksheet.col_values(1)) + 1
+            end_row = start_row + len(rows) - 1
+            if end_row > worksheet.row_count:
+                worksheet.add_rows(end_row - worksheet.row_count)
+            if rows:
+                worksheet.update(rows, f"A{start_row}", value_input_option="RAW")
+    except gspread.SpreadsheetNotFound:
+        logger.error(f"❌ Spreadsheet not found: {SPREADSHEET_ID}")
+        raise HTTPException(status_code=404, detail="Spreadsheet not found or not accessible")
+
+    return {
+        "worksheet_name": worksheet.title,
+        "worksheet_id": worksheet.id,
+        "spreadsheet_url": f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit#gid={worksheet.id}"
+    }
+
+
+async def write_to_google_sheets(client, rows, row_count):
+    """Create a new worksheet for the statement and write its rows as typed cells.
+    The worksheet is added and filled in a single streamed spreadsheets:batchUpdate request
+    (concurrent batches only for very large statements).
+    With APPEND_MODE the rows are appended to the shared statements worksheet instead.
+    rows may be any iterable of row lists (e.g. the iterator from prepare_sheet_data); row_count is its length.
+    """
+    try:
+        if APPEND_MODE:
+            result = await run_in_threadpool(append_to_statements_worksheet, client, rows)
+            logger.info("✅ Appended %d rows to %s", row_count, result["worksheet_name"])
+            return result
 
-        # Worksheet name with timestamp
+        # Worksheet name with timestamp; the sheetId is chosen here so addSheet and updateCells share one request
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         worksheet_name = f"Statement_{timestamp}"
-        logger.info(f"📝 Creating new worksheet: {worksheet_name}")
+        sheet_id = random.randint(1, 2**31 - 1)
+        logger.info("📝 Creating new worksheet: %s", worksheet_name)
 
-        # Create worksheet with default columns increased to DEFAULT_SHEET_COLS
-        worksheet = spreadsheet.add_worksheet(
-            title=worksheet_name,
-            rows=max(len(rows) + 20, 100),
-            cols=DEFAULT_SHEET_COLS
-        )
-
-        # Batch write in chunks for performance
-        if rows:
-            batch_size = 100
-            total_batches = (len(rows) + batch_size - 1) // batch_size
-            for i in range(0, len(rows), batch_size):
-                batch = rows[i:i + batch_size]
-                start_row = i + 1
-                batch_num = (i // batch_size) + 1
-                logger.info(f"📤 Writing batch {batch_num}/{total_batches} (rows {start_row}-{start_row + len(batch) - 1})")
-                worksheet.update(f"A{start_row}", batch)
-            logger.info(f"✅ Successfully wrote {len(rows)} rows to Google Sheets")
+        headers = {
+            "Authorization": f"Bearer {await run_in_threadpool(get_access_token, client)}",
+            "Content-Type": "application/json",
+        }
+        rows = iter(rows)
+        batch_size = SHEETS_WRITE_BATCH_ROWS
+        limiter = _WriteLimiter()
+        async with httpx.AsyncClient(headers=headers, timeout=60.0) as session:
+            if row_count <= batch_size:
+                # Whole statement (and the worksheet itself) in a single request; encoded up front so a 429 can resend it
+                logger.info("📤 Writing %d rows in a single request", row_count)
+                body = await run_in_threadpool(b"".join, _iter_statement_body(sheet_id, worksheet_name, rows, row_count))
+                await limiter.post(session, body)
+            else:
+                # Payload too large for one request: the first batch rides along with addSheet,
+                # the remaining batches are sent concurrently
+                first_batch = list(islice(rows, batch_size))
+                await limiter.post(session, await run_in_threadpool(
+                    _encode_update_cells, sheet_id, 0, first_batch, _add_sheet_request(sheet_id, worksheet_name, row_count)
+                ))
+                await write_batches_concurrently(session, limiter, sheet_id, rows, len(first_batch), row_count, batch_size)
+        if row_count:
+            logger.info("✅ Successfully wrote %d rows to Google Sheets", row_count)
 
         return {
             "worksheet_name": worksheet_name,
-            "worksheet_id": worksheet.id,
-            "spreadsheet_url": f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit#gid={worksheet.id}"
+            "worksheet_id": sheet_id,
+            "spreadsheet_url": f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit#gid={sheet_id}"
         }
 
-    except gspread.SpreadsheetNotFound:
-        logger.error(f"❌ Spreadsheet not found: {SPREADSHEET_ID}")
-        raise HTTPException(status_code=404, detail="Spreadsheet not found or not accessible")
-    except gspread.APIError as e:
-        logger.error(f"❌ Google Sheets API error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Google Sheets API error: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            logger.error(f"❌ Spreadsheet not found: {SPREADSHEET_ID}")
+            raise HTTPException(status_code=404, detail="Spreadsheet not found or not accessible")
+        logger.error(f"❌ Google Sheets API error: {e.response.status_code} {e.response.text}")
+        raise HTTPException(status_code=500, detail=f"Google Sheets API error: {e.response.text}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error writing to Google Sheets: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error writing to sheets: {str(e)}")
 
+# -----------------------------
+# Statement Read Cache
+# -----------------------------
+def _statement_cache_path(worksheet_name, modified_time):
+    """Cache file for one version (spreadsheet modifiedTime) of a worksheet."""
+    key = hashlib.sha1(f"{worksheet_name}:{modified_time}".encode()).hexdigest()
+    return pathlib.Path(STATEMENT_CACHE_DIR) / f"{key}.json"
+
+
+def load_cached_statement(worksheet_name, modified_time):
+    """Return the cached /get_statement payload for this worksheet version, or None if missing or expired."""
+    path = _statement_cache_path(worksheet_name, modified_time)
+    try:
+        if time.time() - path.stat().st_mtime > STATEMENT_CACHE_MAX_AGE:
+            return None
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable statement cache entry {path.name}: {str(e)}")
+        return None
+
+
+def store_cached_statement(worksheet_name, modified_time, payload):
+    """Persist a /get_statement payload and evict expired / excess entries (oldest first)."""
+    path = _statement_cache_path(worksheet_name, modified_time)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp file per writer, so concurrent stores of the same key never clobber each other's data
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            f.write(orjson.dumps(payload))
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+        entries = []
+        for entry in path.parent.glob("*.json"):
+            try:
+                entries.append((entry.stat().st_mtime, entry))
+            except FileNotFoundError:
+                pass  # evicted by a concurrent store
+        entries.sort(key=lambda item: item[0], reverse=True)
+        cutoff = time.time() - STATEMENT_CACHE_MAX_AGE
+        for i, (mtime, entry) in enumerate(entries):
+            if i >= STATEMENT_CACHE_MAX_SIZE or mtime < cutoff:
+                entry.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write statement cache: {str(e)}")
+
 # -----------------------------
 # API Endpoints
 # -----------------------------
+# (epoch second, ISO string) of the last /health timestamp
+_health_timestamp_cache = (0, "")
+
+
+def health_timestamp():
+    """Current local time as an ISO string at second resolution, formatted at most once per second."""
+    global _health_timestamp_cache
+    second = int(time.time())
+    if second != _health_timestamp_cache[0]:
+        _health_timestamp_cache = (second, datetime.fromtimestamp(second).isoformat())
+    return _health_timestamp_cache[1]
+
+
 @app.get("/")
 async def root():
     """API root endpoint"""
@@ -400,36 +900,37 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": health_timestamp(),
         "service": "Statement of Accounts API"
     }
 
 
 @app.get("/check_credentials")
-async def check_credentials():
-    """Check if Google Sheets credentials are properly configured (and spreadsheet accessible)."""
+async def check_credentials(refresh: bool = False):
+    """Check if Google Sheets credentials are properly configured (and spreadsheet accessible).
+    Uses the cached client; pass ?refresh=true to re-read the credentials file and re-authorize.
+    """
     logger.info("🔍 Checking Google Sheets credentials...")
-    client = get_google_sheets_client()
+    client = await run_in_threadpool(get_google_sheets_client, force=refresh)
     if client is None:
         return {
             "status": "error",
             "message": "Google Sheets credentials not found or invalid",
             "instructions": [
-                "1. Ensure 'cred.json' is in your project directory",
+                "1. Ensure 'cred.json' is in your project directory (or set GOOGLE_APPLICATION_CREDENTIALS)",
                 "2. Verify the file contains valid service account credentials",
                 "3. Share the Google Sheet with the service account email"
             ],
             "spreadsheet_id": SPREADSHEET_ID
         }
 
+    import gspread  # already loaded by get_google_sheets_client()
+
     try:
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
+        spreadsheet = await run_in_threadpool(client.open_by_key, SPREADSHEET_ID)
+        worksheets = await run_in_threadpool(spreadsheet.worksheets)
 
-        service_account_email = "Unknown"
-        if os.path.exists(CREDENTIALS_FILE):
-            with open(CREDENTIALS_FILE, 'r') as f:
-                cred_data = json.load(f)
-                service_account_email = cred_data.get('client_email', 'Unknown')
+        service_account_email = get_credentials_info().get('client_email') or 'Unknown'
 
         return {
             "status": "success",
@@ -438,7 +939,7 @@ async def check_credentials():
             "spreadsheet_id": SPREADSHEET_ID,
             "spreadsheet_url": f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit",
             "service_account": service_account_email,
-            "worksheet_count": len(spreadsheet.worksheets())
+            "worksheet_count": len(worksheets)
         }
     except gspread.SpreadsheetNotFound:
         return {
@@ -471,12 +972,13 @@ async def create_statement(data: StatementData):
         logger.info("=" * 60)
 
         # Prepare the data (uses env MONTHLY_INTEREST_RATE by default)
-        rows, summary = prepare_sheet_data(data.invoices, data.payments)
+        rows, summary = await prepare_statement(data.invoices, data.payments)
+        rows_written = summary.get("rows_written", 0)
 
         if "error" in summary:
             logger.warning(f"⚠️ Data preparation warning: {summary.get('error')}")
 
-        client = get_google_sheets_client()
+        client = await run_in_threadpool(get_google_sheets_client)
         if client is None:
             # Simulated mode: return preview and summary without writing to Google Sheets
             logger.warning("⚠️ Running in SIMULATED MODE - No Google credentials")
@@ -485,16 +987,18 @@ async def create_statement(data: StatementData):
                 "message": "Statement created successfully (SIMULATED - No Google credentials)",
                 "instructions": "To write to actual Google Sheets, configure your cred.json file",
                 "spreadsheet_id": SPREADSHEET_ID,
-                "worksheet_name": f"Statement_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                "worksheet_name": (
+                    STATEMENTS_WORKSHEET_NAME if APPEND_MODE else f"Statement_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                ),
                 "summary": summary,
-                "preview_rows": rows[:10] if rows else [],
+                "preview_rows": list(islice(rows, 10)),
                 "spreadsheet_url": f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit",
-                "rows_written": len(rows),
+                "rows_written": rows_written,
             }
 
         # Write to Google Sheets
         logger.info("📤 Writing to Google Sheets...")
-        sheet_result = write_to_google_sheets(client, rows)
+        sheet_result = await write_to_google_sheets(client, rows, rows_written)
 
         logger.info("✅ STATEMENT CREATED SUCCESSFULLY!")
         logger.info(f"📊 Worksheet: {sheet_result['worksheet_name']}")
@@ -507,7 +1011,7 @@ async def create_statement(data: StatementData):
             "worksheet_name": sheet_result['worksheet_name'],
             "summary": summary,
             "spreadsheet_url": sheet_result['spreadsheet_url'],
-            "rows_written": len(rows),
+            "rows_written": rows_written,
         }
 
     except HTTPException:
@@ -525,7 +1029,7 @@ async def append_to_statement(data: StatementData):
     """
     try:
         logger.info("📥 Append request received")
-        rows, summary = prepare_sheet_data(data.invoices, data.payments)
+        rows, summary = await prepare_statement(data.invoices, data.payments)
 
         return {
             "status": "success",
@@ -544,7 +1048,7 @@ async def append_to_statement(data: StatementData):
 async def get_statement(worksheet_name: Optional[str] = None):
     """Retrieve statement data from Google Sheets. If worksheet_name is omitted, returns available sheets."""
     try:
-        client = get_google_sheets_client()
+        client = await run_in_threadpool(get_google_sheets_client)
         if client is None:
             return {
                 "status": "error",
@@ -552,28 +1056,47 @@ async def get_statement(worksheet_name: Optional[str] = None):
                 "data": None
             }
 
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        worksheets = spreadsheet.worksheets()
-        worksheet_list = [ws.title for ws in worksheets]
+        import gspread  # already loaded by get_google_sheets_client()
+
+        spreadsheet = await run_in_threadpool(client.open_by_key, SPREADSHEET_ID)
 
         if worksheet_name:
+            # Serve repeat reads of an unchanged spreadsheet from the on-disk cache
+            modified_time = await run_in_threadpool(spreadsheet.get_lastUpdateTime)
+            cached = await run_in_threadpool(load_cached_statement, worksheet_name, modified_time)
+            if cached is not None:
+                return {
+                    "status": "success",
+                    "worksheet": worksheet_name,
+                    "rows": cached["rows"],
+                    "data": cached["data"],
+                    "message": "Data retrieved successfully",
+                    "cached": True,
+                }
+
             try:
-                worksheet = spreadsheet.worksheet(worksheet_name)
-                data = worksheet.get_all_values()
+                worksheet = await run_in_threadpool(spreadsheet.worksheet, worksheet_name)
+                data = await run_in_threadpool(worksheet.get_all_values)
+                payload = {"rows": len(data), "data": data[:50]}
+                await run_in_threadpool(store_cached_statement, worksheet_name, modified_time, payload)
                 return {
                     "status": "success",
                     "worksheet": worksheet_name,
-                    "rows": len(data),
-                    "data": data[:50],
-                    "message": "Data retrieved successfully"
+                    "rows": payload["rows"],
+                    "data": payload["data"],
+                    "message": "Data retrieved successfully",
+                    "cached": False,
                 }
             except gspread.WorksheetNotFound:
+                worksheets = await run_in_threadpool(spreadsheet.worksheets)
                 return {
                     "status": "error",
                     "message": f"Worksheet '{worksheet_name}' not found",
-                    "available_worksheets": worksheet_list
+                    "available_worksheets": [ws.title for ws in worksheets]
                 }
         else:
+            worksheets = await run_in_threadpool(spreadsheet.worksheets)
+            worksheet_list = [ws.title for ws in worksheets]
             return {
                 "status": "success",
                 "message": "Available worksheets",
@@ -594,9 +1117,11 @@ if __name__ == "__main__":
 
     logger.info("🚀 Starting Statement of Accounts API...")
     logger.info(f"📊 Target Spreadsheet ID: {SPREADSHEET_ID}")
-    logger.info(f"📄 Looking for credentials file: {CREDENTIALS_FILE}")
+    logger.info(f"📄 Looking for credentials file: {CREDENTIALS_PATH}")
     logger.info(f"🔢 Default monthly interest rate: {MONTHLY_INTEREST_RATE}% per month")
     logger.info(f"🔢 Default sheet columns: {DEFAULT_SHEET_COLS}")
+    if APPEND_MODE:
+        logger.info(f"📎 Append mode: statements are appended to worksheet '{STATEMENTS_WORKSHEET_NAME}'")
 
     client = get_google_sheets_client()
     if client:
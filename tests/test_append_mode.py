@@ -0,0 +1,117 @@
+import re
+import unittest
+
+import gspread
+import requests
+
+import app
+
+
+class FakeWorksheet:
+    """Minimal gspread Worksheet: a grid of rows supporting the calls append mode makes."""
+
+    title = app.STATEMENTS_WORKSHEET_NAME
+    id = 7
+
+    def __init__(self, row_count=1):
+        self.grid = []
+        self.row_count = row_count
+
+    def col_values(self, col):
+        # Like the Sheets API: values up to the last non-empty cell, internal blanks as ""
+        values = [row[col - 1] if len(row) >= col else "" for row in self.grid]
+        while values and values[-1] in ("", None):
+            values.pop()
+        return values
+
+    def add_rows(self, rows):
+        self.row_count += rows
+
+    def update(self, values, range_name, value_input_option=None):
+        start = int(re.fullmatch(r"A(\d+)", range_name).group(1)) - 1
+        if start + len(values) > self.row_count:
+            raise AssertionError("update beyond the worksheet grid")
+        self.grid[start:start + len(values)] = [list(row) for row in values]
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.worksheet_ = None
+
+    def worksheet(self, title):
+        if self.worksheet_ is None:
+            raise gspread.WorksheetNotFound(title)
+        return self.worksheet_
+
+    def add_worksheet(self, title, rows, cols):
+        self.worksheet_ = FakeWorksheet(row_count=rows)
+        return self.worksheet_
+
+
+class RacingSpreadsheet(FakeSpreadsheet):
+    """Another request creates the worksheet between our lookup and add_worksheet."""
+
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def worksheet(self, title):
+        self.lookups += 1
+        if self.lookups == 1:
+            raise gspread.WorksheetNotFound(title)
+        return self.worksheet_
+
+    def add_worksheet(self, title, rows, cols):
+        self.worksheet_ = FakeWorksheet(row_count=rows)
+        response = requests.Response()
+        response.status_code = 400
+        response._content = (
+            b'{"error": {"code": 400, "status": "INVALID_ARGUMENT", '
+            b'"message": "A sheet with the name \\"Statements\\" already exists. Please enter another name."}}'
+        )
+        raise gspread.exceptions.APIError(response)
+
+
+class FakeClient:
+    def __init__(self, spreadsheet=None):
+        self.spreadsheet = spreadsheet or FakeSpreadsheet()
+
+    def open_by_key(self, key):
+        return self.spreadsheet
+
+
+def _statement(invoice_id):
+    rows, _ = app.prepare_sheet_data(
+        [{"Invoice ID": invoice_id, "Balance Due": 100, "Age": 30, "Status": "Open"}],
+        [{"Payment ID": f"P-{invoice_id}", "Paid Amount": 50}],
+    )
+    return list(rows)
+
+
+class AppendModeTest(unittest.TestCase):
+    def test_statements_are_written_one_after_another(self):
+        client = FakeClient()
+        first, second = _statement("INV-1"), _statement("INV-2")
+        # Statements contain fully blank separator rows, which end a values.append "table"
+        self.assertIn([""], first)
+
+        app.append_to_statements_worksheet(client, iter(first))
+        app.append_to_statements_worksheet(client, iter(second))
+
+        self.assertEqual(client.spreadsheet.worksheet_.grid, first + second)
+
+    def test_concurrently_created_worksheet_is_reused(self):
+        client = FakeClient(RacingSpreadsheet())
+        statement = _statement("INV-1")
+        result = app.append_to_statements_worksheet(client, iter(statement))
+        self.assertEqual(result["worksheet_name"], app.STATEMENTS_WORKSHEET_NAME)
+        self.assertEqual(client.spreadsheet.worksheet_.grid, statement)
+
+    def test_empty_statement_writes_nothing(self):
+        client = FakeClient()
+        app.append_to_statements_worksheet(client, iter(()))
+        self.assertEqual(client.spreadsheet.worksheet_.grid, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
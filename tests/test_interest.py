@@ -0,0 +1,48 @@
+import math
+import unittest
+
+import app
+
+
+def _invoice_rows(invoices):
+    """(interest, total balance, age) per invoice row of a prepared statement."""
+    rows, summary = app.prepare_sheet_data(invoices, [], 1.5)
+    header = ["Date", "Reference", "Total", "Balance", "Interest", "Total Balance", "Status", "Age", "Invoice ID", "Balance Due"]
+    rows = list(rows)
+    invoice_rows = rows[rows.index(header) + 1:rows.index(header) + 1 + len(invoices)]
+    return [(row[4], row[5], row[7]) for row in invoice_rows], summary
+
+
+class InterestTest(unittest.TestCase):
+    def test_out_of_range_ages_do_not_fail_the_statement(self):
+        rows, summary = _invoice_rows([
+            {"Balance Due": 100, "Age": 60},
+            {"Balance Due": 50, "Age": 2**63},
+            {"Balance Due": 50, "Age": 10**400},
+            {"Balance Due": 50, "Age": -10**400},
+            {"Balance Due": 50, "Age": -5},
+        ])
+        self.assertNotIn("error", summary)
+        self.assertAlmostEqual(rows[0][0], 100 * (1.015 ** 2 - 1))
+        # Overflowing interest falls back to 0 per invoice; negative ages clamp to 0
+        self.assertEqual([row[0] for row in rows[1:]], [0.0, 0.0, 0.0, 0.0])
+        self.assertEqual([row[2] for row in rows[3:]], [0, 0])
+        self.assertAlmostEqual(summary["total_interest"], rows[0][0])
+        self.assertAlmostEqual(summary["total_balance_plus_interest"], 300 + summary["total_interest"])
+
+    def test_non_finite_balances_keep_non_finite_interest(self):
+        rows, summary = _invoice_rows([
+            {"Balance Due": "nan", "Age": 30},
+            {"Balance Due": "inf", "Age": 30},
+            {"Balance Due": 100, "Age": 30},
+        ])
+        self.assertTrue(math.isnan(rows[0][0]) and math.isnan(rows[0][1]))
+        self.assertEqual((rows[1][0], rows[1][1]), (math.inf, math.inf))
+        self.assertAlmostEqual(rows[2][0], 1.5)
+        # Totals don't claim zero interest next to a non-finite grand total
+        self.assertTrue(math.isnan(summary["total_interest"]))
+        self.assertTrue(math.isnan(summary["total_balance_plus_interest"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import app
+
+
+class AliasLookupTest(unittest.TestCase):
+    """Space and underscore keys resolve like the old get_invoice_field: first key with a non-None / "" value wins."""
+
+    def test_blank_space_key_falls_back_to_underscore_key(self):
+        for blank in ("", None):
+            with self.subTest(blank=blank):
+                invoice = app.Invoice.model_validate({"Balance Due": blank, "Balance_Due": 100, "Invoice ID": blank, "Invoice_ID": "X"})
+                self.assertEqual(invoice.Balance_Due, 100.0)
+                self.assertEqual(invoice.Invoice_ID, "X")
+
+                payment = app.Payment.model_validate({"Paid Amount": blank, "Paid_Amount": "₹50", "Payment ID": blank, "Payment_ID": "P"})
+                self.assertEqual(payment.Paid_Amount, 50.0)
+                self.assertEqual(payment.Payment_ID, "P")
+
+    def test_space_key_wins_when_both_are_set(self):
+        invoice = app.Invoice.model_validate({"Balance Due": 5, "Balance_Due": 100})
+        self.assertEqual(invoice.Balance_Due, 5.0)
+
+    def test_blank_values_use_defaults(self):
+        invoice = app.Invoice.model_validate({"Balance Due": "", "Age": None, "Status": None})
+        self.assertEqual((invoice.Balance_Due, invoice.Age, invoice.Status), (0.0, 0, ""))
+
+    def test_statement_totals_use_the_fallback_key(self):
+        _, summary = app.prepare_sheet_data([{"Balance Due": "", "Balance_Due": 100, "Age": 30}], [])
+        self.assertEqual(summary["total_balance_due"], 100.0)
+        self.assertGreater(summary["total_interest"], 0.0)
+
+
+class CoercionTest(unittest.TestCase):
+    """Lenient field types must convert exactly like the pre-model helpers (safe_int/float_conversion, str())."""
+
+    # (input, Age, Balance Due, text field) — expected values produced by the original conversion code
+    CASES = [
+        (None, 0, 0.0, ""),
+        ("", 0, 0.0, ""),
+        (12, 12, 12.0, "12"),
+        (12.7, 12, 12.7, "12.7"),
+        ("12", 12, 12.0, "12"),
+        (" 12 ", 12, 12.0, " 12 "),
+        ("45.0", 0, 45.0, "45.0"),
+        ("₹1,234.50", 0, 1234.5, "₹1,234.50"),
+        ("$5", 0, 5.0, "$5"),
+        ("1,000", 0, 1000.0, "1,000"),
+        ("abc", 0, 0.0, "abc"),
+        (True, 1, 1.0, "True"),
+        (False, 0, 0.0, "False"),
+        (1e20, 10**20, 1e20, "1e+20"),
+        (-3, -3, -3.0, "-3"),
+    ]
+
+    def test_invoice_fields_match_original_conversions(self):
+        for value, age, balance, text in self.CASES:
+            with self.subTest(value=value):
+                invoice = app.Invoice.model_validate({"Age": value, "Balance Due": value, "Invoice ID": value})
+                self.assertEqual((type(invoice.Age), invoice.Age), (int, age))
+                self.assertEqual((type(invoice.Balance_Due), invoice.Balance_Due), (float, balance))
+                self.assertEqual(invoice.Invoice_ID, text)
+
+    def test_payment_fields_match_original_conversions(self):
+        for value, _, amount, text in self.CASES:
+            with self.subTest(value=value):
+                payment = app.Payment.model_validate({"Payment ID": value, "Paid Amount": value, "Unused_Amount": value})
+                self.assertEqual((payment.Paid_Amount, payment.Unused_Amount), (amount, amount))
+                self.assertEqual(payment.Payment_ID, text)
+
+
+if __name__ == "__main__":
+    unittest.main()
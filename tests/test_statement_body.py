@@ -0,0 +1,38 @@
+import unittest
+
+import orjson
+
+import app
+
+
+def _rows(n):
+    """Rows mixing the value types a statement produces (text, ints, floats)."""
+    return [[f"INV{i}", i, i * 1.5, "₹1,000", ""] for i in range(n)]
+
+
+class StatementBodyTest(unittest.TestCase):
+    """_iter_statement_body hand-assembles JSON; it must decode to the same request as the dict builders."""
+
+    def assert_round_trips(self, row_count, chunk_rows=500):
+        rows = _rows(row_count)
+        body = b"".join(app._iter_statement_body(42, "Statement_test", iter(rows), row_count, chunk_rows=chunk_rows))
+
+        expected = [app._add_sheet_request(42, "Statement_test", row_count)]
+        if row_count:
+            expected.append(app._update_cells_request(42, 0, rows))
+        self.assertEqual(orjson.loads(body), orjson.loads(orjson.dumps({"requests": expected})))
+
+    def test_empty_statement(self):
+        self.assert_round_trips(0)
+
+    def test_single_chunk(self):
+        self.assert_round_trips(3)
+
+    def test_chunk_boundaries(self):
+        for row_count in (4, 5, 11):
+            with self.subTest(row_count=row_count):
+                self.assert_round_trips(row_count, chunk_rows=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+import orjson
+
+import app
+
+_real_sleep = asyncio.sleep
+
+
+async def _no_backoff(delay, *args):
+    # Skip the retry backoff but still yield to the event loop
+    await _real_sleep(0)
+
+
+def _row_index(request):
+    return orjson.loads(request.content)["requests"][0]["updateCells"]["start"]["rowIndex"]
+
+
+def _rows(n):
+    return [[f"INV{i}", i] for i in range(n)]
+
+
+class WriteLimiterTest(unittest.IsolatedAsyncioTestCase):
+    """_WriteLimiter / write_batches_concurrently against an httpx.MockTransport standing in for the Sheets API."""
+
+    def setUp(self):
+        patcher = mock.patch.object(app.asyncio, "sleep", _no_backoff)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_rate_limited_request_is_resent_unchanged(self):
+        bodies = []
+
+        def handler(request):
+            bodies.append(request.content)
+            return httpx.Response(429 if len(bodies) == 1 else 200, json={})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            limiter = app._WriteLimiter()
+            response = await limiter.post(session, b'{"requests": []}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bodies, [b'{"requests": []}'] * 2)
+
+    async def test_exhausted_retries_raise(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(429, json={})
+
+        with mock.patch.object(app, "SHEETS_WRITE_MAX_RETRIES", 2):
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+                with self.assertRaises(httpx.HTTPStatusError) as raised:
+                    await app._WriteLimiter().post(session, b"{}")
+
+        self.assertEqual(raised.exception.response.status_code, 429)
+        self.assertEqual(len(calls), 3)
+
+    async def test_failed_batch_cancels_pending_batches(self):
+        in_flight = []
+        never = asyncio.Event()
+
+        async def handler(request):
+            in_flight.append(_row_index(request))
+            if _row_index(request) == 0:
+                # Fail once every slot is busy, so the other in-flight batches are still waiting on the API
+                while len(in_flight) < 2:
+                    await _real_sleep(0.001)
+                return httpx.Response(500, json={})
+            await never.wait()
+            return httpx.Response(200, json={})
+
+        rows = _rows(8)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            limiter = app._WriteLimiter(concurrency=2)
+            with self.assertRaises(httpx.HTTPStatusError) as raised:
+                await asyncio.wait_for(app.write_batches_concurrently(session, limiter, 7, iter(rows), 0, 8, 2), 5)
+
+        self.assertEqual(raised.exception.response.status_code, 500)
+        # Batches still waiting for a slot are never sent
+        self.assertEqual(sorted(in_flight), [0, 2])
+
+    async def test_requests_go_out_one_at_a_time_after_a_rate_limit(self):
+        written, started = [], 0
+        active, peak_after_429 = 0, 0
+
+        async def handler(request):
+            nonlocal started, active, peak_after_429
+            started += 1
+            if started == 1:
+                # Rate-limit the first request once the whole first wave is in flight
+                while started < 4:
+                    await _real_sleep(0.001)
+                return httpx.Response(429, json={})
+            if started <= 4:
+                await _real_sleep(0.02)
+            else:
+                active += 1
+                peak_after_429 = max(peak_after_429, active)
+                await _real_sleep(0.005)
+                active -= 1
+            written.append(_row_index(request))
+            return httpx.Response(200, json={})
+
+        rows = _rows(12)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            limiter = app._WriteLimiter(concurrency=4)
+            await asyncio.wait_for(app.write_batches_concurrently(session, limiter, 7, iter(rows), 0, 12, 2), 5)
+
+        self.assertEqual(sorted(written), [0, 2, 4, 6, 8, 10])
+        # Everything sent after the 429 (the retry and the remaining batches) went out serially
+        self.assertEqual(started, 7)
+        self.assertEqual(peak_after_429, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()